@@ -22,6 +22,28 @@ def read_jsonl(path: str) -> List[Dict[str, Any]]:
             rows.append(json.loads(line))
     return rows
 
+def find_duplicate_clusters(index: faiss.Index, feats: np.ndarray, threshold: float, batch_size: int = 1024) -> List[int]:
+    """Greedy leader clustering over a batched range search.
+
+    Returns a list where entry i is the row of the representative for row i
+    (a representative points to itself).
+    """
+    n = feats.shape[0]
+    rep = [-1] * n
+    for start in tqdm(range(0, n, batch_size)):
+        batch = feats[start:start + batch_size]
+        # IndexFlatIP range search returns neighbors with inner product > threshold
+        lims, _, idxs = index.range_search(batch, threshold)
+        for bi in range(batch.shape[0]):
+            i = start + bi
+            if rep[i] >= 0:
+                continue
+            rep[i] = i
+            for j in idxs[lims[bi]:lims[bi + 1]].tolist():
+                if j > i and rep[j] < 0:
+                    rep[j] = i
+    return rep
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--meta", required=True, help="metadata jsonl")
@@ -30,6 +52,9 @@ def main():
     ap.add_argument("--pretrained", default=os.getenv("TIR_PRETRAINED", "openai"))
     ap.add_argument("--device", default=os.getenv("TIR_DEVICE", "auto"))
     ap.add_argument("--batch_size", type=int, default=64)
+    ap.add_argument("--dedup", choices=["off", "keep", "drop"], default="off",
+                    help="near-duplicate handling: keep all vectors with a cluster map, or drop non-representatives from the index")
+    ap.add_argument("--dedup_threshold", type=float, default=0.97, help="cosine similarity above which images are near-duplicates")
     args = ap.parse_args()
 
     out_dir = Path(args.out_dir)
@@ -87,6 +112,32 @@ def main():
 
     faiss_path = str(out_dir / "index.faiss")
     idmap_path = str(out_dir / "id_map.json")
+    clusters_path = out_dir / "clusters.json"
+
+    if args.dedup != "off":
+        print(f"[build_index] Clustering near-duplicates (threshold={args.dedup_threshold}) ...")
+        rep = find_duplicate_clusters(index, feats, args.dedup_threshold)
+        clusters: Dict[str, List[str]] = {}
+        for i, r in enumerate(rep):
+            if i != r:
+                clusters.setdefault(image_ids[r], []).append(image_ids[i])
+        n_dups = sum(len(v) for v in clusters.values())
+        print(f"[build_index] Found {len(clusters)} clusters covering {n_dups} duplicates")
+
+        if args.dedup == "drop" and n_dups:
+            keep = [i for i, r in enumerate(rep) if i == r]
+            feats = feats[keep]
+            image_ids = [image_ids[i] for i in keep]
+            index = faiss.IndexFlatIP(d)
+            index.add(feats)
+
+        print(f"[build_index] Saving cluster map to {clusters_path}")
+        with open(clusters_path, "w", encoding="utf-8") as f:
+            json.dump({"mode": args.dedup, "threshold": args.dedup_threshold, "clusters": clusters},
+                      f, ensure_ascii=False, indent=2)
+    elif clusters_path.exists():
+        # stale map from a previous build would no longer match id_map
+        clusters_path.unlink()
     print(f"[build_index] Saving FAISS index to {faiss_path}")
     faiss.write_index(index, faiss_path)
 
@@ -26,6 +26,7 @@ def _load():
     faiss_path = idx_dir / "index.faiss"
     idmap_path = idx_dir / "id_map.json"
     db_path = idx_dir / "meta.db"
+    clusters_path = idx_dir / "clusters.json"
 
     if not faiss_path.exists() or not idmap_path.exists() or not db_path.exists():
         raise RuntimeError(
@@ -37,9 +38,14 @@ def _load():
     index = faiss.read_index(str(faiss_path))
     with open(idmap_path, "r", encoding="utf-8") as f:
         id_map = json.load(f)
+    clusters = None
+    if clusters_path.exists():
+        with open(clusters_path, "r", encoding="utf-8") as f:
+            clusters = json.load(f)
 
     _encoder = CLIPEncoder(settings.MODEL_NAME, settings.PRETRAINED, device=settings.DEVICE)
-    _searcher = Searcher(_session, index=index, id_map=id_map, prompt_templates=settings.PROMPT_TEMPLATES)
+    _searcher = Searcher(_session, index=index, id_map=id_map, prompt_templates=settings.PROMPT_TEMPLATES,
+                         clusters=clusters)
 
     if settings.TRANSLATE_ENABLED:
         _translator = OfflineTranslator(
@@ -59,6 +65,7 @@ def health():
         "ok": True,
         "model": {"name": settings.MODEL_NAME, "pretrained": settings.PRETRAINED, "device": settings.DEVICE},
         "index_dir": settings.INDEX_DIR,
+        "dedup": _searcher.dedup_mode if _searcher is not None else "off",
         "translation": {
             "enabled": settings.TRANSLATE_ENABLED,
             "source": settings.TRANSLATE_SOURCE,
@@ -83,6 +90,9 @@ def search(req: SearchRequest):
         model_std = _searcher.resolve_model(model)
         if model_std:
             rows = _searcher.fetch_images_by_model(model_std)
+            if req.collapse_duplicates:
+                keep = set(_searcher.collapse_ids([r["image_id"] for r in rows]))
+                rows = [r for r in rows if r["image_id"] in keep]
             hits = []
             for r in rows[:req.top_k]:
                 hits.append(SearchHit(
@@ -96,7 +106,8 @@ def search(req: SearchRequest):
             return SearchResponse(mode="model_exact", query_text=q_text, hits=hits)
 
     # 2) vector search path
-    q_text, raw_hits = _searcher.search_vector(_encoder, model=model or None, desc=desc or None, top_k=req.top_k)
+    q_text, raw_hits = _searcher.search_vector(_encoder, model=model or None, desc=desc or None, top_k=req.top_k,
+                                             collapse_duplicates=req.collapse_duplicates)
     hits = []
     for r in raw_hits:
         hits.append(SearchHit(
@@ -6,6 +6,7 @@ class SearchRequest(BaseModel):
     model: Optional[str] = Field(default=None, description="Model string (may be empty).")
     desc: Optional[str] = Field(default=None, description="Description string (may be empty).")
     top_k: int = Field(default=20, ge=1, le=200)
+    collapse_duplicates: bool = Field(default=False, description="Return one image per near-duplicate cluster (needs an index built with --dedup).")
     rerank: bool = Field(default=False, description="Reserved for future cross-encoder rerank (disabled in this minimal build).")
 
 class SearchHit(BaseModel):
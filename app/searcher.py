@@ -9,11 +9,21 @@ from .db import ImageRow, AliasRow
 from .model_normalize import normalize_model
 
 class Searcher:
-    def __init__(self, session: Session, index: faiss.Index, id_map: List[str], prompt_templates: tuple[str, ...]):
+    def __init__(self, session: Session, index: faiss.Index, id_map: List[str], prompt_templates: tuple[str, ...],
+                 clusters: Optional[Dict[str, Any]] = None):
         self.session = session
         self.index = index
         self.id_map = id_map
         self.prompt_templates = prompt_templates
+        # near-duplicate clusters written by build_index (representative -> duplicates)
+        clusters = clusters or {}
+        self.dedup_mode: str = clusters.get("mode", "off")
+        self.cluster_members: Dict[str, List[str]] = clusters.get("clusters") or {}
+        self.cluster_of: Dict[str, str] = {}
+        for rep, members in self.cluster_members.items():
+            self.cluster_of[rep] = rep
+            for m in members:
+                self.cluster_of[m] = rep
         # build in-memory alias map for speed
         self.alias_to_model: Dict[str, str] = {}
         for row in session.execute(select(AliasRow)).scalars().all():
@@ -65,6 +75,26 @@ class Searcher:
             })
         return out
 
+    def collapse_ids(self, image_ids: List[str]) -> List[str]:
+        # keep the first hit of each near-duplicate cluster, order preserved
+        seen = set()
+        out = []
+        for iid in image_ids:
+            key = self.cluster_of.get(iid, iid)
+            if key in seen:
+                continue
+            seen.add(key)
+            out.append(iid)
+        return out
+
+    def expand_ids(self, image_ids: List[str]) -> List[str]:
+        # re-attach duplicates that were dropped from the index, right after their representative
+        out = []
+        for iid in image_ids:
+            out.append(iid)
+            out.extend(self.cluster_members.get(iid, []))
+        return out
+
     def build_prompts(self, q_text: str) -> List[str]:
         q_text = q_text.strip()
         if not q_text:
@@ -77,7 +107,8 @@ class Searcher:
         scores, idxs = self.index.search(q, topk)
         return scores[0], idxs[0]
 
-    def search_vector(self, encoder, model: Optional[str], desc: Optional[str], top_k: int, candidate_k: int = 100):
+    def search_vector(self, encoder, model: Optional[str], desc: Optional[str], top_k: int, candidate_k: int = 100,
+                      collapse_duplicates: bool = False):
         parts = []
         if model:
             parts.append(model.strip())
@@ -90,7 +121,11 @@ class Searcher:
         # L2 normalize again (mean may break unit norm)
         query_vec = query_vec / (np.linalg.norm(query_vec) + 1e-12)
 
-        scores, idxs = self.faiss_search(query_vec, topk=min(candidate_k, max(top_k, 1)))
+        topk = min(candidate_k, max(top_k, 1))
+        if collapse_duplicates and self.dedup_mode == "keep":
+            # duplicates are still in the index, over-fetch so collapsing leaves enough hits
+            topk = max(topk, candidate_k)
+        scores, idxs = self.faiss_search(query_vec, topk=topk)
         image_ids = []
         score_map = {}
         for s, ix in zip(scores.tolist(), idxs.tolist()):
@@ -100,6 +135,15 @@ class Searcher:
             image_ids.append(iid)
             score_map[iid] = float(s)
 
+        if collapse_duplicates:
+            image_ids = self.collapse_ids(image_ids)
+        elif self.dedup_mode == "drop":
+            image_ids = self.expand_ids(image_ids)
+            for iid in image_ids:
+                if iid not in score_map:
+                    score_map[iid] = score_map[self.cluster_of[iid]]
+        image_ids = image_ids[:max(top_k, 1)]
+
         rows = self.fetch_image_rows_by_ids(image_ids)
         # preserve FAISS order
         hits = []